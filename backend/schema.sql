@@ -1,7 +1,7 @@
 -- =====================
 -- CORE TABLES
 -- =====================
-CREATE TABLE olympiads (
+CREATE TABLE IF NOT EXISTS olympiads (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     name TEXT NOT NULL UNIQUE,
     pin TEXT NOT NULL CHECK(length(pin) <= 4),
@@ -10,7 +10,7 @@ CREATE TABLE olympiads (
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE TABLE events (
+CREATE TABLE IF NOT EXISTS events (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     olympiad_id INTEGER NOT NULL REFERENCES olympiads(id) ON DELETE CASCADE,
     name TEXT NOT NULL,
@@ -22,7 +22,7 @@ CREATE TABLE events (
     UNIQUE (olympiad_id, name)
 );
 
-CREATE TABLE players (
+CREATE TABLE IF NOT EXISTS players (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     olympiad_id INTEGER NOT NULL REFERENCES olympiads(id) ON DELETE CASCADE,
     name TEXT NOT NULL,
@@ -32,7 +32,7 @@ CREATE TABLE players (
     UNIQUE (olympiad_id, name)
 );
 
-CREATE TABLE teams (
+CREATE TABLE IF NOT EXISTS teams (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     olympiad_id INTEGER NOT NULL REFERENCES olympiads(id) ON DELETE CASCADE,
     name TEXT NOT NULL,
@@ -42,24 +42,25 @@ CREATE TABLE teams (
     UNIQUE (olympiad_id, name)
 );
 
-CREATE TABLE team_players (
+CREATE TABLE IF NOT EXISTS team_players (
     team_id INTEGER REFERENCES teams(id) ON DELETE CASCADE,
     player_id INTEGER REFERENCES players(id) ON DELETE CASCADE,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     PRIMARY KEY (team_id, player_id)
 );
 
-CREATE TABLE participants (
+CREATE TABLE IF NOT EXISTS participants (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     player_id INTEGER UNIQUE REFERENCES players(id) ON DELETE CASCADE,
     team_id INTEGER UNIQUE REFERENCES teams(id) ON DELETE CASCADE,
+    display_name TEXT NOT NULL, -- copy of players.name / teams.name, kept in sync on create and rename
     CHECK (
         (player_id IS NULL AND team_id IS NOT NULL) OR
         (player_id IS NOT NULL AND team_id IS NULL)
     )
 );
 
-CREATE TABLE event_participants (
+CREATE TABLE IF NOT EXISTS event_participants (
     event_id INTEGER REFERENCES events(id) ON DELETE CASCADE,
     participant_id INTEGER REFERENCES participants(id) ON DELETE CASCADE,
     PRIMARY KEY (event_id, participant_id)
@@ -68,7 +69,7 @@ CREATE TABLE event_participants (
 -- =====================
 -- TOURNAMENT STRUCTURE
 -- =====================
-CREATE TABLE event_stages (
+CREATE TABLE IF NOT EXISTS event_stages (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     event_id INTEGER NOT NULL REFERENCES events(id) ON DELETE CASCADE,
     advancement_mechanism TEXT NOT NULL DEFAULT 'pool' CHECK(advancement_mechanism IN ('pool', 'bracket')),
@@ -81,7 +82,7 @@ CREATE TABLE event_stages (
     UNIQUE (event_id, stage_order)
 );
 
-CREATE TABLE groups (
+CREATE TABLE IF NOT EXISTS groups (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     event_stage_id INTEGER NOT NULL REFERENCES event_stages(id) ON DELETE CASCADE,
     version INTEGER NOT NULL DEFAULT 1,
@@ -89,7 +90,7 @@ CREATE TABLE groups (
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE TABLE group_participants (
+CREATE TABLE IF NOT EXISTS group_participants (
     group_id INTEGER REFERENCES groups(id) ON DELETE CASCADE,
     participant_id INTEGER REFERENCES participants(id) ON DELETE CASCADE,
     seed INTEGER,
@@ -102,7 +103,7 @@ CREATE TABLE group_participants (
 -- =====================
 -- MATCHES
 -- =====================
-CREATE TABLE matches (
+CREATE TABLE IF NOT EXISTS matches (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     group_id INTEGER NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
     status TEXT NOT NULL DEFAULT 'pending' CHECK(status IN ('pending', 'running', 'finished')),
@@ -112,7 +113,7 @@ CREATE TABLE matches (
 );
 
 -- NOTE: round and position are computed in the application layer
-CREATE TABLE bracket_matches (
+CREATE TABLE IF NOT EXISTS bracket_matches (
     match_id INTEGER PRIMARY KEY REFERENCES matches(id) ON DELETE CASCADE,
     winner_next_match_id INTEGER REFERENCES matches(id) ON DELETE SET NULL, -- null for final match
     loser_next_match_id INTEGER REFERENCES matches(id) ON DELETE SET NULL, -- null means eliminated
@@ -124,14 +125,14 @@ CREATE TABLE bracket_matches (
 -- =====================
 -- MATCH PARTICIPATION
 -- =====================
-CREATE TABLE match_participants (
+CREATE TABLE IF NOT EXISTS match_participants (
     match_id INTEGER REFERENCES matches(id) ON DELETE CASCADE,
     participant_id INTEGER REFERENCES participants(id) ON DELETE CASCADE,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     PRIMARY KEY (match_id, participant_id)
 );
 
-CREATE TABLE match_participant_scores (
+CREATE TABLE IF NOT EXISTS match_participant_scores (
     match_id INTEGER,
     participant_id INTEGER,
     score INTEGER NOT NULL,
@@ -145,14 +146,14 @@ CREATE TABLE match_participant_scores (
 -- =====================
 -- SESSIONS
 -- =====================
-CREATE TABLE sessions (
-    id TEXT PRIMARY KEY,  -- secure random token
+CREATE TABLE IF NOT EXISTS sessions (
+    id BLOB PRIMARY KEY,  -- 16 random bytes, base64url-encoded in the session cookie
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE TABLE session_olympiad_auth (
-    session_id TEXT REFERENCES sessions(id) ON DELETE CASCADE,
+CREATE TABLE IF NOT EXISTS session_olympiad_auth (
+    session_id BLOB REFERENCES sessions(id) ON DELETE CASCADE,
     olympiad_id INTEGER REFERENCES olympiads(id) ON DELETE CASCADE,
     authorized_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     PRIMARY KEY (session_id, olympiad_id)
@@ -161,17 +162,18 @@ CREATE TABLE session_olympiad_auth (
 -- =====================
 -- INDEXES
 -- =====================
-CREATE INDEX idx_events_olympiad_id ON events(olympiad_id);
-CREATE INDEX idx_players_olympiad_id ON players(olympiad_id);
-CREATE INDEX idx_teams_olympiad_id ON teams(olympiad_id);
-CREATE INDEX idx_team_players_player_id ON team_players(player_id);
-CREATE INDEX idx_participants_player_id ON participants(player_id);
-CREATE INDEX idx_participants_team_id ON participants(team_id);
-CREATE INDEX idx_event_stages_event_id ON event_stages(event_id);
-CREATE INDEX idx_groups_event_stage_id ON groups(event_stage_id);
-CREATE INDEX idx_group_participants_participant_id ON group_participants(participant_id);
-CREATE INDEX idx_matches_group_id ON matches(group_id);
-CREATE INDEX idx_bracket_matches_winner_next_match_id ON bracket_matches(winner_next_match_id);
-CREATE INDEX idx_bracket_matches_loser_next_match_id ON bracket_matches(loser_next_match_id);
-CREATE INDEX idx_match_participants_participant_id ON match_participants(participant_id);
-CREATE INDEX idx_event_participants_participant_id ON event_participants(participant_id);
+CREATE INDEX IF NOT EXISTS idx_events_olympiad_id ON events(olympiad_id);
+CREATE INDEX IF NOT EXISTS idx_players_olympiad_id ON players(olympiad_id);
+CREATE INDEX IF NOT EXISTS idx_teams_olympiad_id ON teams(olympiad_id);
+CREATE INDEX IF NOT EXISTS idx_team_players_player_id ON team_players(player_id);
+CREATE INDEX IF NOT EXISTS idx_participants_player_id ON participants(player_id);
+CREATE INDEX IF NOT EXISTS idx_participants_team_id ON participants(team_id);
+CREATE INDEX IF NOT EXISTS idx_event_stages_event_id ON event_stages(event_id);
+CREATE INDEX IF NOT EXISTS idx_groups_event_stage_id ON groups(event_stage_id);
+CREATE INDEX IF NOT EXISTS idx_group_participants_participant_id ON group_participants(participant_id);
+CREATE INDEX IF NOT EXISTS idx_matches_group_id ON matches(group_id);
+CREATE INDEX IF NOT EXISTS idx_bracket_matches_winner_next_match_id ON bracket_matches(winner_next_match_id);
+CREATE INDEX IF NOT EXISTS idx_bracket_matches_loser_next_match_id ON bracket_matches(loser_next_match_id);
+CREATE INDEX IF NOT EXISTS idx_match_participants_participant_id ON match_participants(participant_id);
+CREATE INDEX IF NOT EXISTS idx_event_participants_participant_id ON event_participants(participant_id);
+CREATE INDEX IF NOT EXISTS idx_session_olympiad_auth_olympiad_id ON session_olympiad_auth(olympiad_id);
@@ -1,9 +1,13 @@
+import functools
 import os
+import secrets
+import threading
 from collections import defaultdict
 
 from fastapi import Request
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
 from jinja2_fragments import render_block as _jinja2_render_block
 from pathlib import Path
 
@@ -29,13 +33,35 @@ class Status(Enum):
     PREVIOUS_STAGE_INCOMPLETE  = "previous_stage_incomplete"
 
 
+# Accepted values for form fields that mirror the CHECK constraints in the
+# schema; FastAPI rejects anything else with a 422 before the handler runs.
+class ScoreKind(str, Enum):
+    points  = "points"
+    outcome = "outcome"
+
+
+class AdvancementMechanism(str, Enum):
+    pool    = "pool"
+    bracket = "bracket"
+
+
 db_path = Path(os.environ["DATABASE_PATH"])
 schema_path = Path(os.environ["SCHEMA_PATH"])
 root = Path(os.environ["PROJECT_ROOT"])
+# Dev runs throw the database away on shutdown; otherwise it persists across restarts
+dev_mode = bool(os.environ.get("ENNIO_DEV"))
 
 templates = Jinja2Templates(directory=root / "frontend" / "templates")
 root_templates = Jinja2Templates(directory=root / "frontend")
 
+# Templates ship with the app: compile each once and never stat() the file again.
+# The bytecode cache (per-user temp dir) lets a restarted worker skip recompiling them.
+_bytecode_cache = FileSystemBytecodeCache()
+templates.env.auto_reload = False
+templates.env.bytecode_cache = _bytecode_cache
+root_templates.env.auto_reload = False
+root_templates.env.bytecode_cache = _bytecode_cache
+
 
 def render_event_fragment(block_name: str, **ctx) -> str:
     return _jinja2_render_block(templates.env, "event_page.html", block_name, **ctx)
@@ -49,8 +75,14 @@ def render_olympiad_fragment(block_name: str, **ctx) -> str:
     return _jinja2_render_block(templates.env, "olympiad_page.html", block_name, **ctx)
 
 
+# Modal blocks depend only on a few string arguments, so each variant is rendered once
+@functools.lru_cache(maxsize=64)
+def _render_modal_cached(block_name: str, ctx_items: tuple) -> str:
+    return _jinja2_render_block(templates.env, "modals.html", block_name, **dict(ctx_items))
+
+
 def render_modal_fragment(block_name: str, **ctx) -> str:
-    return _jinja2_render_block(templates.env, "modals.html", block_name, **ctx)
+    return _render_modal_cached(block_name, tuple(sorted(ctx.items())))
 
 
 def render_player_fragment(block_name: str, **ctx) -> str:
@@ -71,60 +103,103 @@ STAGE_KIND_MAP = {
 sentinel_olympiad_badge = {"id": 0, "name": "Olympiad badge", "version": 0}
 
 
+# Bumped after every committed olympiad create/rename/delete. list_olympiads serves
+# it as its ETag; the per-process token keeps ETags from different runs apart.
+_olympiads_list_version = 0
+_olympiads_list_lock = threading.Lock()
+_olympiads_list_token = secrets.token_hex(4)
+
+
+def bump_olympiads_list_version():
+    global _olympiads_list_version
+    with _olympiads_list_lock:
+        _olympiads_list_version += 1
+
+
+def olympiads_list_etag() -> str:
+    return f'"{_olympiads_list_token}-{_olympiads_list_version}"'
+
+
 _event_subscribers: dict[int, set] = defaultdict(set)
 _olympiad_subscribers: dict[int, set] = defaultdict(set)
 _olympiad_page_subscribers: dict[int, set] = defaultdict(set)
 
+# Subscribers are (tab_id, queue, loop) entries. Handlers run in the threadpool,
+# so messages are handed to the queue through its event loop.
+
 
 def notify_event(event_id: int, event_name: str, exclude_tab_id: str = None):
     msg = f"event: {event_name}\ndata: \n\n"
-    for tab_id, queue in list(_event_subscribers.get(event_id, [])):
+    for tab_id, queue, loop in list(_event_subscribers.get(event_id, [])):
         if tab_id != exclude_tab_id:
-            queue.put_nowait(msg)
+            loop.call_soon_threadsafe(queue.put_nowait, msg)
 
 
 def notify_olympiad_page(olympiad_id: int, event_name: str, exclude_tab_id: str = None):
     msg = f"event: {event_name}\ndata: \n\n"
-    for tab_id, queue in list(_olympiad_page_subscribers.get(olympiad_id, [])):
+    for tab_id, queue, loop in list(_olympiad_page_subscribers.get(olympiad_id, [])):
         if tab_id != exclude_tab_id:
-            queue.put_nowait(msg)
+            loop.call_soon_threadsafe(queue.put_nowait, msg)
 
 
 def notify_olympiad(olympiad_id: int, event_name: str, exclude_tab_id: str = None):
     msg = f"event: {event_name}\ndata: \n\n"
-    for tab_id, queue in list(_olympiad_subscribers.get(olympiad_id, [])):
+    for tab_id, queue, loop in list(_olympiad_subscribers.get(olympiad_id, [])):
         if tab_id != exclude_tab_id:
-            queue.put_nowait(msg)
+            loop.call_soon_threadsafe(queue.put_nowait, msg)
 
 
 def notify_olympiad_events(conn, olympiad_id: int, event_name: str):
     rows = conn.execute("SELECT id FROM events WHERE olympiad_id = ?", (olympiad_id,)).fetchall()
-    for row in rows:
-        notify_event(row["id"], event_name)
+    for (event_id,) in rows:
+        notify_event(event_id, event_name)
 
 
 ############################### Database Queries ################################
 
+# Per-table SQL for the entity checks, built once. Looking the table up here
+# doubles as the whitelist for the table name.
+ENTITY_TABLES = ("players", "teams", "events")
+
+_SQL_ENTITY_EXIST = {
+    entities: f"SELECT 1 FROM {entities} WHERE id = ?" for entities in ENTITY_TABLES
+}
+_SQL_ENTITY_NAME = {
+    entities: f"SELECT 1 FROM {entities} WHERE id = ? AND name = ?" for entities in ENTITY_TABLES
+}
+_SQL_ENTITY_NAME_DUPLICATION = {
+    entities: f"SELECT 1 FROM {entities} WHERE olympiad_id = ? AND id != ? AND name = ?"
+    for entities in ENTITY_TABLES
+}
+# Name-duplication and authorization probes fused into one row for the create handlers
+_SQL_ENTITY_CREATE_CHECKS = {
+    entities: f"""
+        SELECT
+            EXISTS(SELECT 1 FROM {entities} WHERE olympiad_id = ? AND name = ?) AS name_taken,
+            EXISTS(SELECT 1 FROM session_olympiad_auth WHERE session_id = ? AND olympiad_id = ?) AS authorized
+    """
+    for entities in ENTITY_TABLES
+}
+
+
 def query_get_event_enrolled_participants(conn, event_id: int) -> list[dict]:
     rows = conn.execute(
         """
-        SELECT ep.participant_id AS id, COALESCE(pl.name, t.name) AS name
+        SELECT ep.participant_id AS id, p.display_name AS name
         FROM event_participants ep
         JOIN participants p ON p.id = ep.participant_id
-        LEFT JOIN players pl ON pl.id = p.player_id
-        LEFT JOIN teams t ON t.id = p.team_id
         WHERE ep.event_id = ?
         """,
         (event_id,)
     ).fetchall()
-    event_enrolled_participants = [{"id": row["id"], "name": row["name"]} for row in rows]
+    event_enrolled_participants = [{"id": id_, "name": name} for id_, name in rows]
     return event_enrolled_participants
 
 
 def query_get_olympiad_enrolled_participants(conn, olympiad_id: int) -> list[dict]:
     rows = conn.execute(
         """
-        SELECT p.id, COALESCE(pl.name, t.name) AS name
+        SELECT p.id, p.display_name AS name
         FROM participants p
         LEFT JOIN players pl ON pl.id = p.player_id
         LEFT JOIN teams t ON t.id = p.team_id
@@ -133,7 +208,7 @@ def query_get_olympiad_enrolled_participants(conn, olympiad_id: int) -> list[dic
         """,
         (olympiad_id,)
     ).fetchall()
-    olympiad_enrolled_participants = [{"id": row["id"], "name": row["name"]} for row in rows]
+    olympiad_enrolled_participants = [{"id": id_, "name": name} for id_, name in rows]
     return olympiad_enrolled_participants
 
 
@@ -186,9 +261,8 @@ def query_update_score(conn, match_id: int, participant_id: int, score: int):
 def query_get_participant_name(conn, participant_id: int):
     row = conn.execute(
         """
-        SELECT COALESCE(pl.name, t.name) AS name FROM participants p
-        LEFT JOIN players pl ON pl.id = p.player_id
-        LEFT JOIN teams t ON t.id = p.team_id WHERE p.id = ?
+        SELECT p.display_name AS name FROM participants p
+        WHERE p.id = ?
         """,
         (participant_id,)
     ).fetchone()
@@ -229,18 +303,27 @@ def _oob_sse_link_html(olympiad_id: int, tab_id: str) -> str:
     return html_content
 
 
+# The placeholder badge only varies by tab id, so each tab's copy is rendered once
+@functools.lru_cache(maxsize=256)
+def render_sentinel_badge_oob(tab_id: str = "") -> str:
+    return templates.get_template("olympiad_badge.html").render(
+        olympiad=sentinel_olympiad_badge, tab_id=tab_id, oob=True
+    )
+
+
 def _oob_badge_html(request, olympiad_id: int):
     conn = request.state.conn
     tab_id = request.headers.get("X-Tab-Id", "")
 
     olympiad_badge_ctx = get_olympiad_from_request(request)
-    olympiad = conn.execute("SELECT * FROM olympiads WHERE id = ?", (olympiad_badge_ctx["id"],)).fetchone()
 
+    # Only a badge showing the olympiad that was just touched needs a fresh read
     if olympiad_id == olympiad_badge_ctx["id"]:
+        olympiad = conn.execute(
+            "SELECT id, name, version FROM olympiads WHERE id = ?", (olympiad_id,)
+        ).fetchone()
         if not olympiad:
-            return templates.get_template("olympiad_badge.html").render(
-                olympiad=sentinel_olympiad_badge, tab_id=tab_id, oob=True
-            )
+            return render_sentinel_badge_oob(tab_id)
         else:
             olympiad_data = {"id": olympiad["id"], "name": olympiad["name"], "version": olympiad["version"]}
             return templates.get_template("olympiad_badge.html").render(
@@ -300,13 +383,26 @@ def _render_operation_denied(result, olympiad_id, entities):
     return html_content, extra_headers
 
 
+def query_olympiad_with_auth(request: Request, olympiad_id: int):
+    result = request.state.conn.execute(
+        """
+        SELECT o.id, o.name, o.version, soa.olympiad_id IS NOT NULL AS authorized
+        FROM olympiads o
+        LEFT JOIN session_olympiad_auth soa ON soa.olympiad_id = o.id AND soa.session_id = ?
+        WHERE o.id = ?
+        """,
+        (request.state.session_id, olympiad_id)
+    ).fetchone()
+    return result
+
+
 def check_olympiad_exist(request: Request, olympiad_id: int):
     result = request.state.conn.execute("SELECT 1 FROM olympiads WHERE id = ?", (olympiad_id,)).fetchone()
     return result
 
 
 def check_entity_exist(request: Request, entities: str, entity_id: int):
-    result = request.state.conn.execute(f"SELECT 1 FROM {entities} WHERE id = ?", (entity_id,)).fetchone()
+    result = request.state.conn.execute(_SQL_ENTITY_EXIST[entities], (entity_id,)).fetchone()
     return result
 
 
@@ -321,12 +417,7 @@ def check_olympiad_name(request: Request, olympiad_id: int, olympiad_name: str):
 
 
 def check_entity_name(request: Request, entities: str, entity_id: int, entity_name: str):
-    result = request.state.conn.execute(
-        f"""
-        SELECT 1 FROM {entities} WHERE id = ? AND name = ?
-        """,
-        (entity_id, entity_name)
-    ).fetchone()
+    result = request.state.conn.execute(_SQL_ENTITY_NAME[entities], (entity_id, entity_name)).fetchone()
     return result
 
 
@@ -390,25 +481,26 @@ def check_olympiad_name_duplication(request: Request, olympiad_id: int, name: st
 
 def check_entity_name_duplication(request: Request, olympiad_id: int, entities: str, entity_id: int, entity_name: str):
     result = request.state.conn.execute(
-        f"""
-        SELECT 1 FROM {entities}
-        WHERE olympiad_id = ? AND id != ? AND name = ?
-        """,
-        (olympiad_id, entity_id, entity_name)
+        _SQL_ENTITY_NAME_DUPLICATION[entities], (olympiad_id, entity_id, entity_name)
     ).fetchone()
     return result
 
 
-def check_pin_valid(request: Request, olympiad_id: int, pin: str):
+def check_entity_create(request: Request, olympiad_id: int, entities: str, entity_name: str):
     result = request.state.conn.execute(
-        """
-        SELECT 1 FROM olympiads WHERE id = ? AND pin = ?
-        """,
-        (olympiad_id, pin)
+        _SQL_ENTITY_CREATE_CHECKS[entities],
+        (olympiad_id, entity_name, request.state.session_id, olympiad_id)
     ).fetchone()
     return result
 
 
+def check_pin_valid(request: Request, olympiad_id: int, pin: str):
+    row = request.state.conn.execute(
+        "SELECT pin FROM olympiads WHERE id = ?", (olympiad_id,)
+    ).fetchone()
+    return row is not None and secrets.compare_digest(row["pin"].encode(), pin.encode())
+
+
 def check_event_in_registration(request: Request, event_id: int):
     row = request.state.conn.execute(
         "SELECT current_stage_order FROM events WHERE id = ?", (event_id,)
@@ -452,11 +544,10 @@ def check_min_participants(request: Request, event_id: int, min_count: int):
 
 def _get_edit_textbox(request: Request, entities: str, item_id: int, name: str):
     template_ctx = {"curr_name": name, "entities": entities, "id": item_id}
-    return templates.TemplateResponse(request, "edit_entity.html", template_ctx)
+    return HTMLResponse(templates.get_template("edit_entity.html").render(**template_ctx))
 
 
 def _cancel_edit(request: Request, entities: str, item_id: int, name: str):
-    hx_target = "#olympiad-badge" if entities == "olympiads" else "#main-content"
     return HTMLResponse(templates.env.get_template("entity_macros.html").module.entity_element({"id": item_id, "name": name}, entities))
 
 
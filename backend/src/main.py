@@ -1,10 +1,16 @@
+import base64
+import gzip
+import hashlib
 import secrets
+import time
 
 from contextlib import asynccontextmanager
 
 import uvicorn
 from fastapi import FastAPI, Request, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse, Response
+from starlette.requests import HTTPConnection
 
 from . import database
 from .routers import events, olympiads, players, teams
@@ -14,8 +20,26 @@ from .internal import dependencies as dep
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     database.init_db(dep.db_path, dep.schema_path)
+    _known_sessions.clear()
+    # Compile (or load from the bytecode cache) every template before the first request
+    for name in dep.templates.env.list_templates(extensions=["html"]):
+        dep.templates.get_template(name)
+    dep.root_templates.get_template("index.html")
+    # The stylesheet only changes on deploy: keep it (and its gzip encoding) in memory
+    # with a strong ETag per representation
+    css = (dep.root / "frontend" / "index.css").read_bytes()
+    css_digest = hashlib.sha1(css).hexdigest()
+    app.state.css = css
+    app.state.css_etag = f'"{css_digest}"'
+    app.state.css_gzip = gzip.compress(css, compresslevel=9)
+    app.state.css_gzip_etag = f'"{css_digest}-gzip"'
     yield
-    dep.db_path.unlink()
+    database.close_pool()
+    if dep.dev_mode:
+        dep.db_path.unlink(missing_ok=True)
+
+
+HEALTH_RESPONSE_BODY = b"200"
 
 
 app = FastAPI(lifespan=lifespan)
@@ -26,31 +50,105 @@ app.include_router(players.router)
 app.include_router(teams.router)
 
 
-@app.middleware("http")
-async def session_middleware(request: Request, call_next):
-    session_id = request.cookies.get("session")
-    conn = database.get_connection(dep.db_path)
+# Session ids this process has already seen in the sessions table, mapped to when
+# their cookie was last sent. Rows are never deleted while the process runs, so a
+# hit skips the lookup; the map is simply dropped when it grows past the cap and
+# refills from the table.
+_known_sessions: dict[bytes, float] = {}
+_KNOWN_SESSIONS_MAX = 100_000
+# The cookie's max_age slides forward, but re-sending it hourly is enough for that
+_COOKIE_REFRESH_SECONDS = 3600
 
-    try:
-        if session_id:
-            cursor = conn.execute("SELECT id FROM sessions WHERE id = ?", (session_id,))
-            if not cursor.fetchone():
-                session_id = None
 
-        if not session_id:
-            session_id = secrets.token_urlsafe(32)
-            conn.execute("INSERT INTO sessions (id) VALUES (?)", (session_id,))
-            conn.commit()
+def _resolve_session(conn, cookie: str | None) -> tuple[bytes, str, bool]:
+    # Session ids are 16 random bytes stored as a BLOB key; the cookie carries
+    # them base64url-encoded without padding. A known cookie costs a dict lookup,
+    # or one indexed query the first time this process sees it. An unknown,
+    # malformed or missing one gets a fresh server-generated id (never the
+    # client's), inserted in autocommit mode. The flag says whether to (re)send
+    # the cookie on this response.
+    now = time.monotonic()
+    session_id = None
+    if cookie:
+        try:
+            session_id = base64.urlsafe_b64decode(cookie + "=" * (-len(cookie) % 4))
+        except ValueError:
+            session_id = None
 
-        request.state.session_id = session_id
-        request.state.conn = conn
+    if session_id in _known_sessions:
+        if now - _known_sessions[session_id] < _COOKIE_REFRESH_SECONDS:
+            return session_id, cookie, False
+        _known_sessions[session_id] = now
+        return session_id, cookie, True
 
-        response = await call_next(request)
-        response.set_cookie("session", session_id, httponly=True, max_age=86400)
-    finally:
-        conn.close()
+    if session_id and not conn.execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone():
+        session_id = None
 
-    return response
+    if not session_id:
+        session_id = secrets.token_bytes(16)
+        cookie = base64.urlsafe_b64encode(session_id).rstrip(b"=").decode()
+        conn.execute("INSERT INTO sessions (id) VALUES (?)", (session_id,))
+
+    if len(_known_sessions) >= _KNOWN_SESSIONS_MAX:
+        _known_sessions.clear()
+    _known_sessions[session_id] = now
+
+    return session_id, cookie, True
+
+
+# Paths that never touch the database or the session skip the middleware's DB work
+_SESSIONLESS_PATHS = frozenset({"/health", "/index.css"})
+
+
+# Resolves the session and lends the request a pooled connection. Written as plain
+# ASGI rather than @app.middleware("http") so no extra task or body stream is created
+# per request. The connection goes back to the pool as soon as the response starts,
+# so long-lived streaming responses (SSE) never hold one.
+class SessionMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in _SESSIONLESS_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        # Route handlers are plain defs and already run in the threadpool; the
+        # connection checkout and session lookup (which can wait on the write lock)
+        # are pushed there too instead of blocking the loop.
+        conn = await run_in_threadpool(database.acquire_connection, dep.db_path)
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                database.release_connection(conn)
+
+        try:
+            session_id, cookie, send_cookie = await run_in_threadpool(
+                _resolve_session, conn, HTTPConnection(scope).cookies.get("session")
+            )
+
+            state = scope.setdefault("state", {})
+            state["session_id"] = session_id
+            state["conn"] = conn
+
+            async def send_with_session(message):
+                if message["type"] == "http.response.start":
+                    release()
+                    if send_cookie:
+                        set_cookie = f"session={cookie}; HttpOnly; Max-Age=86400; Path=/; SameSite=lax"
+                        message["headers"] = [*message.get("headers", []), (b"set-cookie", set_cookie.encode())]
+                await send(message)
+
+            await self.app(scope, receive, send_with_session)
+        finally:
+            release()
+
+
+app.add_middleware(SessionMiddleware)
 
 
 # ---------------------------------------------------------------------------
@@ -59,20 +157,51 @@ async def session_middleware(request: Request, call_next):
 
 @app.get("/health")
 def get_health():
-    from fastapi.responses import JSONResponse
-    return JSONResponse(200)
+    return Response(HEALTH_RESPONSE_BODY, media_type="application/json")
 
 
 @app.get("/", response_class=HTMLResponse)
 def read_root(request: Request):
     tab_id = secrets.token_urlsafe(16)
-    return dep.root_templates.TemplateResponse(request, "index.html", {"tab_id": tab_id})
+    return HTMLResponse(dep.root_templates.get_template("index.html").render(tab_id=tab_id))
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    # An explicit gzip entry decides; otherwise a "*" entry does. q=0 means refused.
+    wildcard_q = None
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name == "gzip":
+            return q > 0
+        if name == "*":
+            wildcard_q = q
+    return wildcard_q is not None and wildcard_q > 0
 
 
 @app.get("/index.css")
-def serve_css():
-    css_path = dep.root / "frontend" / "index.css"
-    return Response(content=css_path.read_text(), media_type="text/css")
+def serve_css(request: Request):
+    state = request.app.state
+    headers = {"Cache-Control": "public, max-age=3600", "Vary": "Accept-Encoding"}
+    if _accepts_gzip(request.headers.get("accept-encoding", "")):
+        body = state.css_gzip
+        headers["ETag"] = state.css_gzip_etag
+        headers["Content-Encoding"] = "gzip"
+    else:
+        body = state.css
+        headers["ETag"] = state.css_etag
+
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="text/css", headers=headers)
 
 
 # ---------------------------------------------------------------------------
@@ -1,7 +1,9 @@
 from itertools import combinations
-from collections import defaultdict, deque
+from functools import lru_cache
+from collections import defaultdict
 
 import asyncio
+import json
 
 from fastapi import APIRouter, Request, Form, Query
 from fastapi.responses import HTMLResponse, StreamingResponse
@@ -10,17 +12,59 @@ from ..internal import dependencies as dep
 
 router = APIRouter(prefix="/api/events")
 
+# Insert statements shared by the stage generators. Keeping one string per
+# statement keeps the hits in sqlite3's per-connection statement cache.
+_INSERT_GROUP_SQL             = "INSERT INTO groups (event_stage_id) VALUES (?) RETURNING id"
+_INSERT_GROUP_PARTICIPANT_SQL = "INSERT INTO group_participants (group_id, participant_id, seed) VALUES (?, ?, ?)"
+_INSERT_MATCH_SQL             = "INSERT INTO matches (group_id) VALUES (?) RETURNING id"
+_INSERT_MATCH_BATCH_SQL       = "INSERT INTO matches (group_id) VALUES (?)"
+_INSERT_MATCH_PARTICIPANT_SQL = "INSERT INTO match_participants (match_id, participant_id) VALUES (?, ?)"
+_INSERT_BRACKET_MATCH_SQL     = "INSERT INTO bracket_matches (match_id, winner_next_match_id, loser_next_match_id) VALUES (?, ?, ?)"
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
 
+@lru_cache(maxsize=None)
+def bracket_seeding(size: int) -> tuple:
+    """Return the seed order of first-round slots for a bracket of `size`.
+
+    Standard bracket seeding ensures top seeds meet as late as possible.
+    For size=8: (1,8, 4,5, 2,7, 3,6)
+      -> match 0: seed 1 vs 8, match 1: seed 4 vs 5, etc.
+    Built by iterative doubling and computed once per size.
+    """
+    seeds = [1]
+    while len(seeds) < size:
+        pair_sum = len(seeds) * 2 + 1
+        seeds = [x for s in seeds for x in (s, pair_sum - s)]
+    return tuple(seeds)
+
+
+def _insert_matches(conn, group_id: int, count: int) -> range:
+    """Insert `count` matches into group_id with one batch and return their ids.
+
+    Rowids of a batch insert are contiguous as long as nothing else writes to
+    matches in between: callers hold the write transaction (BEGIN IMMEDIATE)
+    and no trigger inserts into matches, so the ids end at last_insert_rowid().
+    """
+    if count == 0:
+        return range(0)
+    conn.executemany(_INSERT_MATCH_BATCH_SQL, [(group_id,)] * count)
+    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    return range(last_id - count + 1, last_id + 1)
+
+
 def generate_groups_stage(conn, stage_id: int, num_groups: int, participant_ids=None):
     """Tear down and rebuild groups for the given event stage.
 
     1. Retrieves all enrolled participants from event_participants (or uses participant_ids)
     2. Distributes them across num_groups groups (round-robin)
     3. Creates round-robin matches within each group
+
+    Callers must already hold a transaction (BEGIN IMMEDIATE) so the teardown
+    and every insert are committed together.
     """
     stage = conn.execute(
         "SELECT event_id FROM event_stages WHERE id = ?", (stage_id,)
@@ -32,7 +76,7 @@ def generate_groups_stage(conn, stage_id: int, num_groups: int, participant_ids=
             "SELECT participant_id FROM event_participants WHERE event_id = ? ORDER BY participant_id",
             (event_id,)
         ).fetchall()
-        participant_ids = [r["participant_id"] for r in participant_rows]
+        participant_ids = [pid for (pid,) in participant_rows]
     n = len(participant_ids)
 
     # Teardown: CASCADE handles group_participants, matches, match_participants, scores
@@ -50,31 +94,24 @@ def generate_groups_stage(conn, stage_id: int, num_groups: int, participant_ids=
     for i, pid in enumerate(participant_ids):
         buckets[i % num_groups].append(pid)
 
+    # Only groups and matches need ids back; the link rows for every group are
+    # collected here and flushed with one executemany each.
+    group_participant_rows = []
+    match_participant_rows = []
     for bucket in buckets:
-        group_id = conn.execute(
-            "INSERT INTO groups (event_stage_id) VALUES (?) RETURNING id",
-            (stage_id,)
-        ).fetchone()["id"]
-
-        for seed, pid in enumerate(bucket):
-            conn.execute(
-                "INSERT INTO group_participants (group_id, participant_id, seed) VALUES (?, ?, ?)",
-                (group_id, pid, seed)
-            )
+        group_id = conn.execute(_INSERT_GROUP_SQL, (stage_id,)).fetchone()["id"]
+        group_participant_rows.extend((group_id, pid, seed) for seed, pid in enumerate(bucket))
+
+        size = len(bucket)
+        match_ids = _insert_matches(conn, group_id, size * (size - 1) // 2)
+        match_participant_rows.extend(
+            (match_id, pid)
+            for match_id, pair in zip(match_ids, combinations(bucket, 2))
+            for pid in pair
+        )
 
-        for p1, p2 in combinations(bucket, 2):
-            match_id = conn.execute(
-                "INSERT INTO matches (group_id) VALUES (?) RETURNING id",
-                (group_id,)
-            ).fetchone()["id"]
-            conn.execute(
-                "INSERT INTO match_participants (match_id, participant_id) VALUES (?, ?)",
-                (match_id, p1)
-            )
-            conn.execute(
-                "INSERT INTO match_participants (match_id, participant_id) VALUES (?, ?)",
-                (match_id, p2)
-            )
+    conn.executemany(_INSERT_GROUP_PARTICIPANT_SQL, group_participant_rows)
+    conn.executemany(_INSERT_MATCH_PARTICIPANT_SQL, match_participant_rows)
 
 
 def generate_single_elimination_stage(conn, stage_id: int, participant_ids=None):
@@ -84,6 +121,8 @@ def generate_single_elimination_stage(conn, stage_id: int, participant_ids=None)
     2. Creates one group containing all participants
     3. Builds the full bracket tree (matches + bracket_matches links)
     4. Assigns participants to first-round matches with standard seeding and byes
+
+    Callers must already hold a transaction (BEGIN IMMEDIATE).
     """
     stage = conn.execute(
         "SELECT event_id FROM event_stages WHERE id = ?", (stage_id,)
@@ -95,7 +134,7 @@ def generate_single_elimination_stage(conn, stage_id: int, participant_ids=None)
             "SELECT participant_id FROM event_participants WHERE event_id = ? ORDER BY participant_id",
             (event_id,)
         ).fetchall()
-        participant_ids = [r["participant_id"] for r in participant_rows]
+        participant_ids = [pid for (pid,) in participant_rows]
     n = len(participant_ids)
 
     # Teardown: CASCADE handles group_participants, matches, match_participants,
@@ -112,106 +151,57 @@ def generate_single_elimination_stage(conn, stage_id: int, participant_ids=None)
     num_rounds = bracket_size.bit_length() - 1
 
     # Single group for the whole bracket
-    group_id = conn.execute(
-        "INSERT INTO groups (event_stage_id) VALUES (?) RETURNING id",
-        (stage_id,)
-    ).fetchone()["id"]
+    group_id = conn.execute(_INSERT_GROUP_SQL, (stage_id,)).fetchone()["id"]
 
-    for seed, pid in enumerate(participant_ids):
-        conn.execute(
-            "INSERT INTO group_participants (group_id, participant_id, seed) VALUES (?, ?, ?)",
-            (group_id, pid, seed)
-        )
-
-    # Standard bracket seeding ensures top seeds meet as late as possible.
-    # For bracket_size=8: [1,8, 4,5, 2,7, 3,6]
-    #   -> match 0: seed 1 vs 8, match 1: seed 4 vs 5, etc.
-    def bracket_seeding(size):
-        if size == 1:
-            return [1]
-        half = bracket_seeding(size // 2)
-        result = []
-        for s in half:
-            result.append(s)
-            result.append(size + 1 - s)
-        return result
+    conn.executemany(_INSERT_GROUP_PARTICIPANT_SQL, [(group_id, pid, seed) for seed, pid in enumerate(participant_ids)])
 
     seeds = bracket_seeding(bracket_size)
 
-    # Create matches round by round (first round → final)
+    # Create all bracket_size - 1 matches in one batch, plus the third-place match
+    # when there are at least 2 rounds (semifinals exist). It is inserted last.
+    has_third_place = num_rounds >= 2
+    match_ids = _insert_matches(conn, group_id, bracket_size - 1 + has_third_place)
+    third_place_match_id = match_ids[-1] if has_third_place else None
+
+    # Split the ids round by round (first round → final)
     rounds = []
+    offset = 0
     for round_num in range(num_rounds):
         match_count = bracket_size // (2 ** (round_num + 1))
-        round_matches = []
-        for _ in range(match_count):
-            match_id = conn.execute(
-                "INSERT INTO matches (group_id) VALUES (?) RETURNING id",
-                (group_id,)
-            ).fetchone()["id"]
-            round_matches.append(match_id)
-        rounds.append(round_matches)
+        rounds.append(match_ids[offset:offset + match_count])
+        offset += match_count
 
     # Link bracket_matches: each match points to its parent in the next round.
     # Final match has winner_next_match_id = NULL (no next match).
-    for round_idx, round_matches in enumerate(rounds):
-        for i, match_id in enumerate(round_matches):
-            if round_idx == len(rounds) - 1:
-                winner_next_match_id = None
-            else:
-                winner_next_match_id = rounds[round_idx + 1][i // 2]
-            conn.execute(
-                "INSERT INTO bracket_matches (match_id, winner_next_match_id) VALUES (?, ?)",
-                (match_id, winner_next_match_id)
-            )
-
-    # Create a third-place match when there are at least 2 rounds (semifinals exist).
-    # Losers of the semifinals feed into this match.
-    if num_rounds >= 2:
-        third_place_match_id = conn.execute(
-            "INSERT INTO matches (group_id) VALUES (?) RETURNING id",
-            (group_id,)
-        ).fetchone()["id"]
-        conn.execute(
-            "INSERT INTO bracket_matches (match_id, winner_next_match_id) VALUES (?, NULL)",
-            (third_place_match_id,)
+    # Losers of the semifinals feed into the third-place match.
+    bracket_match_rows = []
+    for round_idx, (round_matches, next_round) in enumerate(zip(rounds, rounds[1:])):
+        loser_next_match_id = third_place_match_id if round_idx == num_rounds - 2 else None
+        bracket_match_rows.extend(
+            (match_id, next_round[i // 2], loser_next_match_id)
+            for i, match_id in enumerate(round_matches)
         )
-        for semifinal_match_id in rounds[-2]:
-            conn.execute(
-                "UPDATE bracket_matches SET loser_next_match_id = ? WHERE match_id = ?",
-                (third_place_match_id, semifinal_match_id)
-            )
+    bracket_match_rows.append((rounds[-1][0], None, None))
+    if has_third_place:
+        bracket_match_rows.append((third_place_match_id, None, None))
+    conn.executemany(_INSERT_BRACKET_MATCH_SQL, bracket_match_rows)
 
     # Assign participants to first-round matches.
-    # Seeds beyond n are byes (no participant inserted).
+    # Seeds beyond n are byes (no participant inserted); a lone participant is
+    # auto-advanced to the next round.
     first_round = rounds[0]
+    first_round_rows = []
+    bye_rows = []
     for i, match_id in enumerate(first_round):
-        seed_a = seeds[i * 2]
-        seed_b = seeds[i * 2 + 1]
-        if seed_a <= n:
-            conn.execute(
-                "INSERT INTO match_participants (match_id, participant_id) VALUES (?, ?)",
-                (match_id, participant_ids[seed_a - 1])
-            )
-        if seed_b <= n:
-            conn.execute(
-                "INSERT INTO match_participants (match_id, participant_id) VALUES (?, ?)",
-                (match_id, participant_ids[seed_b - 1])
-            )
-
-    # Auto-advance bye participants (matches with only one player) to the next round.
-    for match_id in first_round:
-        pids = conn.execute(
-            "SELECT participant_id FROM match_participants WHERE match_id = ?", (match_id,)
-        ).fetchall()
-        if len(pids) == 1:
-            bm = conn.execute(
-                "SELECT winner_next_match_id FROM bracket_matches WHERE match_id = ?", (match_id,)
-            ).fetchone()
-            if bm and bm["winner_next_match_id"]:
-                conn.execute(
-                    "INSERT OR IGNORE INTO match_participants (match_id, participant_id) VALUES (?, ?)",
-                    (bm["winner_next_match_id"], pids[0]["participant_id"])
-                )
+        pids = [participant_ids[seed - 1] for seed in (seeds[i * 2], seeds[i * 2 + 1]) if seed <= n]
+        first_round_rows.extend((match_id, pid) for pid in pids)
+        if len(pids) == 1 and num_rounds > 1:
+            bye_rows.append((rounds[1][i // 2], pids[0]))
+    conn.executemany(_INSERT_MATCH_PARTICIPANT_SQL, first_round_rows)
+    conn.executemany(
+        "INSERT OR IGNORE INTO match_participants (match_id, participant_id) VALUES (?, ?)",
+        bye_rows
+    )
 
 
 def generate_individual_score_stage(conn, stage_id: int, num_groups: int, participant_ids=None):
@@ -219,6 +209,7 @@ def generate_individual_score_stage(conn, stage_id: int, num_groups: int, partic
 
     Each group gets exactly one match containing all participants in the group.
     Participants submit individual scores; ranking is by score descending.
+    Callers must already hold a transaction (BEGIN IMMEDIATE).
     """
     stage = conn.execute(
         "SELECT event_id FROM event_stages WHERE id = ?", (stage_id,)
@@ -230,7 +221,7 @@ def generate_individual_score_stage(conn, stage_id: int, num_groups: int, partic
             "SELECT participant_id FROM event_participants WHERE event_id = ? ORDER BY participant_id",
             (event_id,)
         ).fetchall()
-        participant_ids = [r["participant_id"] for r in participant_rows]
+        participant_ids = [pid for (pid,) in participant_rows]
     n = len(participant_ids)
 
     conn.execute("DELETE FROM groups WHERE event_stage_id = ?", (stage_id,))
@@ -247,27 +238,13 @@ def generate_individual_score_stage(conn, stage_id: int, num_groups: int, partic
     for bucket in buckets:
         if not bucket:
             continue
-        group_id = conn.execute(
-            "INSERT INTO groups (event_stage_id) VALUES (?) RETURNING id",
-            (stage_id,)
-        ).fetchone()["id"]
+        group_id = conn.execute(_INSERT_GROUP_SQL, (stage_id,)).fetchone()["id"]
 
-        for seed, pid in enumerate(bucket):
-            conn.execute(
-                "INSERT INTO group_participants (group_id, participant_id, seed) VALUES (?, ?, ?)",
-                (group_id, pid, seed)
-            )
+        conn.executemany(_INSERT_GROUP_PARTICIPANT_SQL, [(group_id, pid, seed) for seed, pid in enumerate(bucket)])
 
         # One match per group; every participant in the group competes in it
-        match_id = conn.execute(
-            "INSERT INTO matches (group_id) VALUES (?) RETURNING id",
-            (group_id,)
-        ).fetchone()["id"]
-        for pid in bucket:
-            conn.execute(
-                "INSERT INTO match_participants (match_id, participant_id) VALUES (?, ?)",
-                (match_id, pid)
-            )
+        match_id = conn.execute(_INSERT_MATCH_SQL, (group_id,)).fetchone()["id"]
+        conn.executemany(_INSERT_MATCH_PARTICIPANT_SQL, [(match_id, pid) for pid in bucket])
 
 
 def present_individual_score_stage(conn, stage_id: int):
@@ -291,11 +268,9 @@ def present_individual_score_stage(conn, stage_id: int):
         match_id = match_row["id"] if match_row else None
 
         part_rows = conn.execute(
-            "SELECT gp.participant_id, COALESCE(pl.name, t.name) AS display_name, mps.score "
+            "SELECT gp.participant_id, p.display_name, mps.score "
             "FROM group_participants gp "
             "JOIN participants p ON p.id = gp.participant_id "
-            "LEFT JOIN players pl ON pl.id = p.player_id "
-            "LEFT JOIN teams t ON t.id = p.team_id "
             "LEFT JOIN match_participant_scores mps "
             "  ON mps.match_id = ? AND mps.participant_id = gp.participant_id "
             "WHERE gp.group_id = ? ORDER BY gp.seed",
@@ -303,8 +278,8 @@ def present_individual_score_stage(conn, stage_id: int):
         ).fetchall()
 
         participants = [
-            {"id": r["participant_id"], "name": r["display_name"], "score": r["score"]}
-            for r in part_rows
+            {"id": pid, "name": display_name, "score": score}
+            for pid, display_name, score in part_rows
         ]
         ranked = sorted(participants, key=lambda p: (p["score"] is None, -(p["score"] or 0)))
 
@@ -334,68 +309,79 @@ def present_individual_score_stage(conn, stage_id: int):
 def present_groups_stage(conn, stage_id: int):
     """Build and render a groups stage for display."""
 
-    # Build groups data
+    # Build groups data: one query per table for the whole stage, bucketed by group
     group_rows = conn.execute(
         "SELECT id FROM groups WHERE event_stage_id = ? ORDER BY id",
         (stage_id,)
     ).fetchall()
 
-    groups = []
-    for idx, grow in enumerate(group_rows):
-        gid = grow["id"]
-
-        # Participant names in seed order
-        part_rows = conn.execute(
-            "SELECT gp.participant_id, COALESCE(pl.name, t.name) AS display_name "
-            "FROM group_participants gp "
-            "JOIN participants p ON p.id = gp.participant_id "
-            "LEFT JOIN players pl ON pl.id = p.player_id "
-            "LEFT JOIN teams t ON t.id = p.team_id "
-            "WHERE gp.group_id = ? ORDER BY gp.seed",
-            (gid,)
-        ).fetchall()
-
-        participants = [r["display_name"] for r in part_rows]
-        pid_to_name = {r["participant_id"]: r["display_name"] for r in part_rows}
+    # Participant names in seed order
+    part_cursor = conn.execute(
+        "SELECT gp.group_id, gp.participant_id, p.display_name "
+        "FROM groups g "
+        "JOIN group_participants gp ON gp.group_id = g.id "
+        "JOIN participants p ON p.id = gp.participant_id "
+        "WHERE g.event_stage_id = ? ORDER BY gp.group_id, gp.seed",
+        (stage_id,)
+    )
 
-        match_rows = conn.execute(
-            "SELECT m.id, "
-            "  mp1.participant_id AS p1_id, mp2.participant_id AS p2_id, "
-            "  mps1.score AS p1_score, mps2.score AS p2_score "
-            "FROM matches m "
-            "JOIN match_participants mp1 ON mp1.match_id = m.id "
-            "JOIN match_participants mp2 ON mp2.match_id = m.id "
-            "  AND mp2.participant_id > mp1.participant_id "
-            "LEFT JOIN match_participant_scores mps1 "
-            "  ON mps1.match_id = m.id AND mps1.participant_id = mp1.participant_id "
-            "LEFT JOIN match_participant_scores mps2 "
-            "  ON mps2.match_id = m.id AND mps2.participant_id = mp2.participant_id "
-            "WHERE m.group_id = ?",
-            (gid,)
-        ).fetchall()
+    # A participant sits in exactly one group of a stage, so one position map
+    # (index into its group's seed-ordered list) serves them all
+    participants_by_gid = defaultdict(list)
+    pos_by_pid = {}
+    for gid, pid, display_name in part_cursor:
+        pos_by_pid[pid] = len(participants_by_gid[gid])
+        participants_by_gid[gid].append(display_name)
+
+    # One row per match participant; the two sides of each match are paired up
+    # below (lower participant id first) instead of self-joining match_participants.
+    match_cursor = conn.execute(
+        "SELECT m.group_id, m.id, mp.participant_id, mps.score "
+        "FROM groups g "
+        "JOIN matches m ON m.group_id = g.id "
+        "JOIN match_participants mp ON mp.match_id = m.id "
+        "LEFT JOIN match_participant_scores mps "
+        "  ON mps.match_id = m.id AND mps.participant_id = mp.participant_id "
+        "WHERE g.event_stage_id = ? "
+        "ORDER BY m.id, mp.participant_id",
+        (stage_id,)
+    )
 
-        scores = {}
-        for mr in match_rows:
-            p1_name = pid_to_name.get(mr["p1_id"])
-            p2_name = pid_to_name.get(mr["p2_id"])
-            if p1_name and p2_name:
-                score_str = (
-                    f"{mr['p1_score']} - {mr['p2_score']}"
-                    if mr["p1_score"] is not None and mr["p2_score"] is not None
-                    else None
-                )
-                scores.setdefault(p1_name, {})[p2_name] = {
-                    "match_id": mr["id"],
-                    "p1_id": mr["p1_id"],
-                    "p2_id": mr["p2_id"],
-                    "score": score_str,
-                }
+    match_sides = defaultdict(list)
+    for gid, match_id, pid, score in match_cursor:
+        match_sides[(gid, match_id)].append((pid, score))
 
-        groups.append({
+    # Score grid per group: scores[i][j] is the match between the participants at
+    # positions i and j, stored with the lower participant id as the row.
+    scores_by_gid = {
+        gid: [[None] * len(names) for _ in names]
+        for gid, names in participants_by_gid.items()
+    }
+    for (gid, match_id), sides in match_sides.items():
+        if len(sides) != 2:
+            continue
+        (p1_id, p1_score), (p2_id, p2_score) = sides
+        if p1_id in pos_by_pid and p2_id in pos_by_pid:
+            score_str = (
+                f"{p1_score} - {p2_score}"
+                if p1_score is not None and p2_score is not None
+                else None
+            )
+            scores_by_gid[gid][pos_by_pid[p1_id]][pos_by_pid[p2_id]] = {
+                "match_id": match_id,
+                "p1_id": p1_id,
+                "p2_id": p2_id,
+                "score": score_str,
+            }
+
+    groups = [
+        {
             "name": f"Girone {chr(65 + idx)}",
-            "participants": participants,
-            "scores": scores,
-        })
+            "participants": participants_by_gid[gid],
+            "scores": scores_by_gid.get(gid, []),
+        }
+        for idx, (gid,) in enumerate(group_rows)
+    ]
 
     total_participants = sum(len(g["participants"]) for g in groups)
 
@@ -435,19 +421,16 @@ def _cascade_clear_bracket(conn, match_id, pids):
     if not bm or bm["winner_next_match_id"] is None:
         return
     next_mid = bm["winner_next_match_id"]
-    ph = ",".join("?" * len(pids))
+    # pids travel as one JSON array so the statement text (and its cached
+    # prepared statement) does not depend on how many there are.
     found = {r["participant_id"] for r in conn.execute(
-        f"SELECT participant_id FROM match_participants "
-        f"WHERE match_id = ? AND participant_id IN ({ph})",
-        [next_mid] + list(pids)
+        "DELETE FROM match_participants "
+        "WHERE match_id = ? AND participant_id IN (SELECT value FROM json_each(?)) "
+        "RETURNING participant_id",
+        (next_mid, json.dumps(list(pids)))
     ).fetchall()}
     if not found:
         return
-    for pid in found:
-        conn.execute(
-            "DELETE FROM match_participants WHERE match_id = ? AND participant_id = ?",
-            (next_mid, pid)
-        )
     conn.execute("DELETE FROM match_participant_scores WHERE match_id = ?", (next_mid,))
     _cascade_clear_bracket(conn, next_mid, found)
 
@@ -513,16 +496,24 @@ def present_single_elimination_stage(conn, stage_id, view_round):
     view_round index, along with navigation metadata.
     """
 
-    rows = conn.execute(
-        "SELECT m.id AS match_id, bm.winner_next_match_id, bm.loser_next_match_id "
+    # Stream the bracket match ids straight off the cursor. The third-place match
+    # is the loser_next_match_id target of the semifinals.
+    bracket_ids = []
+    third_place_id = None
+    for match_id, loser_next_match_id in conn.execute(
+        "SELECT m.id AS match_id, bm.loser_next_match_id "
         "FROM groups g "
         "JOIN matches m ON m.group_id = g.id "
         "JOIN bracket_matches bm ON bm.match_id = m.id "
-        "WHERE g.event_stage_id = ?",
+        "WHERE g.event_stage_id = ? "
+        "ORDER BY m.id",
         (stage_id,)
-    ).fetchall()
+    ):
+        bracket_ids.append(match_id)
+        if third_place_id is None and loser_next_match_id is not None:
+            third_place_id = loser_next_match_id
 
-    if not rows:
+    if not bracket_ids:
         return {
             "rounds": [],
             "id": stage_id,
@@ -534,73 +525,55 @@ def present_single_elimination_stage(conn, stage_id, view_round):
             "third_place_match": None
         }
 
-    match_ids = [r["match_id"] for r in rows]
-    placeholders = ",".join("?" * len(match_ids))
-
-    mp_rows = conn.execute(
-        f"SELECT mp.match_id, mp.participant_id, "
-        f"  COALESCE(pl.name, t.name) AS display_name "
-        f"FROM match_participants mp "
-        f"JOIN participants p ON p.id = mp.participant_id "
-        f"LEFT JOIN players pl ON pl.id = p.player_id "
-        f"LEFT JOIN teams t ON t.id = p.team_id "
-        f"WHERE mp.match_id IN ({placeholders}) "
-        f"ORDER BY mp.participant_id",
-        match_ids
-    ).fetchall()
+    # Participants and their scores for every match of the stage in one pass
+    mp_cursor = conn.execute(
+        "SELECT mp.match_id, mp.participant_id, "
+        "  p.display_name, mps.score "
+        "FROM groups g "
+        "JOIN matches m ON m.group_id = g.id "
+        "JOIN match_participants mp ON mp.match_id = m.id "
+        "JOIN participants p ON p.id = mp.participant_id "
+        "LEFT JOIN match_participant_scores mps "
+        "  ON mps.match_id = mp.match_id AND mps.participant_id = mp.participant_id "
+        "WHERE g.event_stage_id = ? "
+        "ORDER BY mp.participant_id",
+        (stage_id,)
+    )
 
     match_parts = defaultdict(list)
-    for r in mp_rows:
-        match_parts[r["match_id"]].append((r["participant_id"], r["display_name"]))
-
-    score_rows = conn.execute(
-        f"SELECT match_id, participant_id, score "
-        f"FROM match_participant_scores "
-        f"WHERE match_id IN ({placeholders})",
-        match_ids
-    ).fetchall()
     score_map = {}
-    for r in score_rows:
-        score_map[(r["match_id"], r["participant_id"])] = r["score"]
-
-    feeders = defaultdict(list)
-    matches_by_id = {}
-
-    # Identify the third-place match: it's the loser_next_match_id target of semifinals.
-    third_place_id = None
-    for r in rows:
-        if r["loser_next_match_id"] is not None:
-            third_place_id = r["loser_next_match_id"]
-            break
-
-    for r in rows:
-        if r["match_id"] == third_place_id:
-            continue  # exclude third-place match from the main bracket BFS
-        matches_by_id[r["match_id"]] = r
-        if r["winner_next_match_id"] is not None:
-            feeders[r["winner_next_match_id"]].append(r["match_id"])
-
-    final_id = None
-    for mid, r in matches_by_id.items():
-        if r["winner_next_match_id"] is None:
-            final_id = mid
-            break
+    for match_id, participant_id, display_name, score in mp_cursor:
+        match_parts[match_id].append((participant_id, display_name))
+        if score is not None:
+            score_map[(match_id, participant_id)] = score
+
+    # generate_single_elimination_stage creates the bracket in one contiguous
+    # batch, round by round (first round → final) and top to bottom, followed
+    # by the third-place match. Sorted ids therefore split into rounds of
+    # halving size, each already in layout order; no tree walk is needed.
+    if third_place_id is not None:
+        bracket_ids.remove(third_place_id)
+    round_mids = []
+    offset = 0
+    round_size = (len(bracket_ids) + 1) // 2
+    while offset < len(bracket_ids):
+        round_mids.append(bracket_ids[offset:offset + round_size])
+        offset += round_size
+        round_size = max(1, round_size // 2)
 
-    round_assignment = {}
-    bfs_queue = deque([(final_id, 0)])
-    while bfs_queue:
-        mid, depth = bfs_queue.popleft()
-        round_assignment[mid] = depth
-        for feeder_id in feeders.get(mid, []):
-            bfs_queue.append((feeder_id, depth + 1))
+    total_rounds = len(round_mids)
 
-    max_round = max(round_assignment.values()) if round_assignment else 0
-    rounds_list = []
-    for r in range(max_round, -1, -1):
-        mids_in_round = [mid for mid, rn in round_assignment.items() if rn == r]
+    # Clamp view_round so it always shows 2 rounds when possible
+    max_view = max(0, total_rounds - 2)
+    view_round = max(0, min(view_round, max_view))
 
+    # Slice: 2 rounds for the current window (1 if only 1 round exists).
+    # Match dicts are only built for the rounds actually rendered.
+    window_end = min(view_round + 2, total_rounds)
+    sliced = []
+    for abs_round in range(view_round, window_end):
         match_dicts = []
-        for mid in mids_in_round:
+        for mid in round_mids[abs_round]:
             parts = match_parts.get(mid, [])
             p1_id   = parts[0][0] if len(parts) > 0 else None
             p2_id   = parts[1][0] if len(parts) > 1 else None
@@ -629,19 +602,7 @@ def present_single_elimination_stage(conn, stage_id, view_round):
                 "winner_id": winner_id,
             })
 
-        rounds_list.append({"matches": match_dicts})
-
-    total_rounds = len(rounds_list)
-
-    # Clamp view_round so it always shows 2 rounds when possible
-    max_view = max(0, total_rounds - 2)
-    view_round = max(0, min(view_round, max_view))
-
-    # Slice: 2 rounds for the current window (1 if only 1 round exists)
-    window_end = min(view_round + 2, total_rounds)
-    sliced = rounds_list[view_round:window_end]
-    for i, round_data in enumerate(sliced):
-        round_data["abs_round"] = view_round + i
+        sliced.append({"matches": match_dicts, "abs_round": abs_round})
 
     # total_rows: parent cards stacked directly, each taking 2 rows.
     # Child cards slot between their two parents with no extra spacing.
@@ -721,7 +682,7 @@ def compute_group_standings(conn, stage_id: int):
                 "SELECT participant_id FROM group_participants WHERE group_id = ? ORDER BY seed",
                 (gid,)
             ).fetchall()
-            participant_ids = [r["participant_id"] for r in part_rows]
+            participant_ids = [pid for (pid,) in part_rows]
             if not match_row:
                 result.append({"group_id": gid, "ranked_participants": participant_ids})
                 continue
@@ -729,7 +690,7 @@ def compute_group_standings(conn, stage_id: int):
                 "SELECT participant_id, score FROM match_participant_scores WHERE match_id = ?",
                 (match_row["id"],)
             ).fetchall()
-            score_map = {r["participant_id"]: r["score"] for r in score_rows}
+            score_map = {pid: score for pid, score in score_rows}
             ranked = sorted(
                 participant_ids,
                 key=lambda pid: (score_map.get(pid) is None, -(score_map.get(pid) or 0), pid)
@@ -744,7 +705,7 @@ def compute_group_standings(conn, stage_id: int):
             "SELECT participant_id FROM group_participants WHERE group_id = ? ORDER BY seed",
             (gid,)
         ).fetchall()
-        participant_ids = [r["participant_id"] for r in part_rows]
+        participant_ids = [pid for (pid,) in part_rows]
 
         match_rows = conn.execute(
             "SELECT mp1.participant_id AS p1_id, mp2.participant_id AS p2_id, "
@@ -762,9 +723,7 @@ def compute_group_standings(conn, stage_id: int):
         ).fetchall()
 
         stats = {pid: {"wins": 0, "total_points": 0} for pid in participant_ids}
-        for mr in match_rows:
-            p1, p2 = mr["p1_id"], mr["p2_id"]
-            s1, s2 = mr["p1_score"], mr["p2_score"]
+        for p1, p2, s1, s2 in match_rows:
             if s1 is None or s2 is None:
                 continue
             stats[p1]["total_points"] += s1
@@ -782,7 +741,7 @@ def compute_group_standings(conn, stage_id: int):
     return result
 
 
-def rebuild_subsequent_stages(conn, from_stage_id: int):
+def rebuild_subsequent_stages(conn, from_stage_id: int, only_if_changed: bool = False):
     """Tear down and rebuild every stage that follows from_stage_id.
 
     Called after any score update so that subsequent stages always reflect
@@ -790,10 +749,14 @@ def rebuild_subsequent_stages(conn, from_stage_id: int):
     which resolves current group standings and regenerates the next stage.
     The cascade stops when there is no further stage or advance_count is 0
     (i.e., the current stage is the final one).
+
+    With only_if_changed, a next stage already seeded with the same qualified
+    participants is left as is (keeping its scores) and the cascade stops there,
+    since every later stage only depends on it.
     """
     current_id = from_stage_id
     while True:
-        populated = populate_next_stage_from_groups(conn, current_id)
+        populated = populate_next_stage_from_groups(conn, current_id, only_if_changed)
         if not populated:
             break
         row = conn.execute(
@@ -809,11 +772,12 @@ def rebuild_subsequent_stages(conn, from_stage_id: int):
         current_id = next_row["id"]
 
 
-def populate_next_stage_from_groups(conn, stage_id: int) -> bool:
+def populate_next_stage_from_groups(conn, stage_id: int, only_if_changed: bool = False) -> bool:
     """Populate the stage after stage_id using top advance_count participants from each group.
 
     Returns True if population was performed, False if nothing to do
-    (no advance_count set or no next stage).
+    (no advance_count set or no next stage, or with only_if_changed the
+    next stage is already seeded with the same participants).
     """
     row = conn.execute(
         """
@@ -842,6 +806,18 @@ def populate_next_stage_from_groups(conn, stage_id: int) -> bool:
     if not qualified_ids:
         return False
 
+    if only_if_changed:
+        # The generators deal participants round-robin over groups in id order,
+        # so ordering by (seed, group) reads back the list they were given.
+        current_ids = [pid for (pid,) in conn.execute(
+            "SELECT gp.participant_id FROM groups g "
+            "JOIN group_participants gp ON gp.group_id = g.id "
+            "WHERE g.event_stage_id = ? ORDER BY gp.seed, g.id",
+            (next_stage_id,)
+        )]
+        if current_ids == qualified_ids:
+            return False
+
     if next_advancement_mechanism == "bracket":
         generate_single_elimination_stage(conn, next_stage_id, participant_ids=qualified_ids)
     elif next_match_size is None:
@@ -929,7 +905,7 @@ def create_event(request: Request, name: str = Form(...)):
 @router.get("/{event_id}/edit")
 def get_edit_textbox_events(request: Request, event_id: int, name: str = Query(...)):
     ctx = {"entities": "events", "curr_name": name, "id": event_id}
-    return dep.templates.TemplateResponse(request, "edit_entity.html", ctx)
+    return HTMLResponse(dep.templates.get_template("edit_entity.html").render(**ctx))
 
 
 @router.get("/{event_id}/cancel-edit")
@@ -1513,17 +1489,14 @@ def get_edit_stage_kind(request: Request, event_id: int, stage_id: int):
         "WHERE es.id = ? AND es.event_id = ?",
         (stage_id, event_id)
     ).fetchone()
-    return dep.templates.TemplateResponse(
-        request,
-        "edit_stage_kind.html",
-        {
-            "stage_id": stage_id,
-            "event_id": event_id,
-            "current_advancement_mechanism": row["advancement_mechanism"],
-            "current_match_size": row["match_size"],
-            "stage_kinds": dep.STAGE_KIND_MAP.values(),
-        }
+    html_content = dep.templates.get_template("edit_stage_kind.html").render(
+        stage_id=stage_id,
+        event_id=event_id,
+        current_advancement_mechanism=row["advancement_mechanism"],
+        current_match_size=row["match_size"],
+        stage_kinds=dep.STAGE_KIND_MAP.values(),
     )
+    return HTMLResponse(html_content)
 
 
 @router.get("/{event_id}/stages/{stage_id}/kind/cancel-edit")
@@ -1533,19 +1506,16 @@ def cancel_edit_stage_kind(request: Request, event_id: int, stage_id: int):
         """
         SELECT es.advancement_mechanism, es.match_size
         FROM event_stages es
-        WHERE es.id = ?
+        WHERE es.id = ? AND es.event_id = ?
         """,
         (stage_id, event_id)
     ).fetchone()
-    return dep.templates.TemplateResponse(
-        request,
-        "stage_kind_display.html",
-        {
-            "stage_id": stage_id,
-            "event_id": event_id,
-            "current_label": dep.STAGE_KIND_MAP[(row["advancement_mechanism"], row["match_size"])]["label"],
-        }
+    html_content = dep.templates.get_template("stage_kind_display.html").render(
+        stage_id=stage_id,
+        event_id=event_id,
+        current_label=dep.STAGE_KIND_MAP[(row["advancement_mechanism"], row["match_size"])]["label"],
     )
+    return HTMLResponse(html_content)
 
 
 @router.patch("/{event_id}/stages/{stage_id}")
@@ -1553,9 +1523,10 @@ def update_stage_kind(
     request: Request,
     event_id: int,
     stage_id: int,
-    advancement_mechanism: str = Form(...),
+    advancement_mechanism: dep.AdvancementMechanism = Form(...),
     match_size: str = Form(...)
 ):
+    advancement_mechanism = advancement_mechanism.value
     match_size = int(match_size)
     conn = request.state.conn
 
@@ -1734,7 +1705,8 @@ def get_score_kind_section(request: Request, event_id: int):
 
 
 @router.put("/{event_id}/score_kind")
-def update_event_score_kind(request: Request, event_id: int, score_kind: str = Form(...)):
+def update_event_score_kind(request: Request, event_id: int, score_kind: dep.ScoreKind = Form(...)):
+    score_kind = score_kind.value
     conn = request.state.conn
 
     olympiad_badge_ctx = dep.get_olympiad_from_request(request)
@@ -1813,9 +1785,8 @@ def get_edit_score(
 
         def get_participant_name(pid):
             row = conn.execute(
-                "SELECT COALESCE(pl.name, t.name) AS name FROM participants p "
-                "LEFT JOIN players pl ON pl.id = p.player_id "
-                "LEFT JOIN teams t ON t.id = p.team_id WHERE p.id = ?", (pid,)
+                "SELECT p.display_name AS name FROM participants p "
+                "WHERE p.id = ?", (pid,)
             ).fetchone()
             return row["name"] if row else str(pid)
 
@@ -1874,7 +1845,7 @@ def cancel_edit_score(
 
 
 @router.put("/{event_id}/matches/{match_id}/score")
-async def update_match_score(
+def update_match_score(
     request: Request,
     event_id: int,
     match_id: int,
@@ -1930,7 +1901,7 @@ async def update_match_score(
             advance_bracket_winner(conn, match_id, winner_id)
             advance_bracket_loser(conn, match_id, winner_id)
 
-        rebuild_subsequent_stages(conn, stage_id)
+        rebuild_subsequent_stages(conn, stage_id, only_if_changed=True)
 
         new_event_version = conn.execute(
             "UPDATE events SET version = version + 1 WHERE id = ? RETURNING version",
@@ -2009,7 +1980,7 @@ def get_edit_individual_score(
 
 
 @router.put("/{event_id}/matches/{match_id}/individual-score")
-async def update_individual_score(
+def update_individual_score(
     request: Request,
     event_id: int,
     match_id: int,
@@ -2036,7 +2007,7 @@ async def update_individual_score(
         dep.query_update_score(conn, match_id, participant_id, score)
         stage_id = dep.query_get_stage_id_from_match_id(conn, match_id)
 
-        rebuild_subsequent_stages(conn, stage_id)
+        rebuild_subsequent_stages(conn, stage_id, only_if_changed=True)
         stage = present_individual_score_stage(conn, stage_id)
 
         ctx = {"stage": stage, "event_id": event_id}
@@ -2072,7 +2043,7 @@ def get_event_deleted_notice(request: Request, event_id: int):
 @router.get("/{event_id}/olympiad-deleted-notice")
 def get_event_olympiad_deleted_notice(request: Request, event_id: int):
     html_content = dep.render_modal_fragment("olympiad_deleted")
-    html_content += dep.templates.get_template("olympiad_badge.html").render(olympiad=dep.sentinel_olympiad_badge, oob=True)
+    html_content += dep.render_sentinel_badge_oob()
     return HTMLResponse(html_content)
 
 
@@ -2095,7 +2066,7 @@ def get_event_olympiad_renamed_notice(request: Request, event_id: int):
 @router.get("/{event_id}/sse")
 async def event_sse(request: Request, event_id: int, tab_id: str = Query("")):
     queue: asyncio.Queue = asyncio.Queue()
-    entry = (tab_id, queue)
+    entry = (tab_id, queue, asyncio.get_running_loop())
     dep._event_subscribers[event_id].add(entry)
 
     async def generate():
@@ -2158,11 +2129,9 @@ def _get_podium_bracket(conn, stage_id: int):
 
     def get_match_result(match_id):
         return conn.execute(
-            "SELECT mp.participant_id, COALESCE(pl.name, t.name) AS name, mps.score "
+            "SELECT mp.participant_id, p.display_name AS name, mps.score "
             "FROM match_participants mp "
             "JOIN participants p ON p.id = mp.participant_id "
-            "LEFT JOIN players pl ON pl.id = p.player_id "
-            "LEFT JOIN teams t ON t.id = p.team_id "
             "LEFT JOIN match_participant_scores mps "
             "  ON mps.match_id = mp.match_id AND mps.participant_id = mp.participant_id "
             "WHERE mp.match_id = ?",
@@ -2206,11 +2175,9 @@ def _get_podium_individual_score(conn, stage_id: int):
     ).fetchone()
 
     rows = conn.execute(
-        "SELECT COALESCE(pl.name, t.name) AS name, mps.score "
+        "SELECT p.display_name AS name, mps.score "
         "FROM group_participants gp "
         "JOIN participants p ON p.id = gp.participant_id "
-        "LEFT JOIN players pl ON pl.id = p.player_id "
-        "LEFT JOIN teams t ON t.id = p.team_id "
         "LEFT JOIN match_participant_scores mps "
         "  ON mps.match_id = ? AND mps.participant_id = gp.participant_id "
         "WHERE gp.group_id = ?",
@@ -2234,12 +2201,10 @@ def _get_podium_groups(conn, stage_id: int):
     gid = group["id"]
 
     rows = conn.execute(
-        "SELECT gp.participant_id, COALESCE(pl.name, t.name) AS name, "
+        "SELECT gp.participant_id, p.display_name AS name, "
         "  SUM(mps.score) AS total_score "
         "FROM group_participants gp "
         "JOIN participants p ON p.id = gp.participant_id "
-        "LEFT JOIN players pl ON pl.id = p.player_id "
-        "LEFT JOIN teams t ON t.id = p.team_id "
         "LEFT JOIN match_participants mp ON mp.participant_id = gp.participant_id "
         "LEFT JOIN matches m ON m.id = mp.match_id AND m.group_id = ? "
         "LEFT JOIN match_participant_scores mps "
@@ -1,7 +1,7 @@
 import asyncio
 
 from fastapi import APIRouter, Request, Form, Query
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 
 from ..internal import dependencies as dep
 
@@ -11,7 +11,7 @@ router = APIRouter(prefix="/api/olympiads")
 @router.get("/{olympiad_id}/sse")
 async def olympiad_sse(request: Request, olympiad_id: int, tab_id: str = Query("")):
     queue: asyncio.Queue = asyncio.Queue()
-    entry = (tab_id, queue)
+    entry = (tab_id, queue, asyncio.get_running_loop())
     dep._olympiad_subscribers[olympiad_id].add(entry)
 
     async def generate():
@@ -33,7 +33,7 @@ async def olympiad_sse(request: Request, olympiad_id: int, tab_id: str = Query("
 @router.get("/{olympiad_id}/page-sse")
 async def olympiad_page_sse(request: Request, olympiad_id: int, tab_id: str = Query("")):
     queue: asyncio.Queue = asyncio.Queue()
-    entry = (tab_id, queue)
+    entry = (tab_id, queue, asyncio.get_running_loop())
     dep._olympiad_page_subscribers[olympiad_id].add(entry)
 
     async def generate():
@@ -59,7 +59,6 @@ def get_olympiad_events_list(request: Request, olympiad_id: int):
         "SELECT id, name FROM events WHERE olympiad_id = ? ORDER BY name",
         (olympiad_id,)
     ).fetchall()
-    events = [{"id": r["id"], "name": r["name"]} for r in events]
     html_content = dep.render_olympiad_fragment("olympiad_events_list", events=events)
     return HTMLResponse(html_content)
 
@@ -71,7 +70,6 @@ def get_olympiad_players_list(request: Request, olympiad_id: int):
         "SELECT id, name FROM players WHERE olympiad_id = ? ORDER BY name",
         (olympiad_id,)
     ).fetchall()
-    players = [{"id": r["id"], "name": r["name"]} for r in players]
     html_content = dep.render_olympiad_fragment("olympiad_players_list", players=players)
     return HTMLResponse(html_content)
 
@@ -80,22 +78,25 @@ def get_olympiad_players_list(request: Request, olympiad_id: int):
 def list_olympiads(request: Request):
     conn = request.state.conn
 
+    # The list only changes on olympiad create/rename/delete, so browsers revalidate
+    # against a version counter and get a 304 without any query or render.
+    etag = dep.olympiads_list_etag()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
     placeholder = "Aggiungi un olympiade"
-    cursor = conn.execute("SELECT id, name, version FROM olympiads")
-    rows = [
-        {"id": row["id"], "name": row["name"], "version": row["version"]}
-        for row in cursor.fetchall()
-    ]
+    items = conn.execute("SELECT id, name, version FROM olympiads").fetchall()
     html_content = dep.render_entity_fragment(
-        "entity_list", entities="olympiads", placeholder=placeholder, items=rows
+        "entity_list", entities="olympiads", placeholder=placeholder, items=items
     )
-    return HTMLResponse(html_content)
+    return HTMLResponse(html_content, headers=headers)
 
 
 @router.get("/create")
 def get_create_olympiad_modal(request: Request, name: str = Query(...)):
     template_ctx = {"params": {"name": name}}
-    return dep.templates.TemplateResponse(request, "pin_modal.html", template_ctx)
+    return HTMLResponse(dep.templates.get_template("pin_modal.html").render(**template_ctx))
 
 
 @router.post("")
@@ -105,11 +106,20 @@ def create_olympiad(request: Request, pin: str = Form(...), name: str = Form(...
 
     conn.execute("BEGIN IMMEDIATE")
 
+    # With a valid PIN the insert itself is the duplication check (UNIQUE(name));
+    # only an invalid PIN needs the separate probe to keep NAME_DUPLICATION first.
+    inserted_row = None
     result = dep.Status.SUCCESS
-    if dep.check_olympiad_name_duplication(request, 0, name):
+    if len(pin) == 4:
+        inserted_row = conn.execute(
+            "INSERT INTO olympiads (name, pin) VALUES (?, ?) ON CONFLICT (name) DO NOTHING RETURNING id",
+            (name, pin)
+        ).fetchone()
+        if inserted_row is None:
+            result = dep.Status.NAME_DUPLICATION
+    elif dep.check_olympiad_name_duplication(request, 0, name):
         result = dep.Status.NAME_DUPLICATION
-
-    if result == dep.Status.SUCCESS and len(pin) != 4:
+    else:
         result = dep.Status.INVALID_PIN
 
     extra_headers = {}
@@ -127,13 +137,10 @@ def create_olympiad(request: Request, pin: str = Form(...), name: str = Form(...
         extra_headers["HX-Reswap"] = "innerHTML"
 
     if result == dep.Status.SUCCESS:
-        row = conn.execute(
-            f"INSERT INTO olympiads (name, pin) VALUES (?, ?) RETURNING id", (name, pin)
-        ).fetchone()
-        olympiad_id = row[0]
+        olympiad_id = inserted_row[0]
 
         conn.execute(
-            f"INSERT INTO session_olympiad_auth (session_id, olympiad_id) VALUES (?, ?)",
+            "INSERT INTO session_olympiad_auth (session_id, olympiad_id) VALUES (?, ?)",
             (session_id, olympiad_id)
         )
         item = {"id": olympiad_id, "name": name}
@@ -147,6 +154,7 @@ def create_olympiad(request: Request, pin: str = Form(...), name: str = Form(...
 
     if result == dep.Status.SUCCESS:
         conn.commit()
+        dep.bump_olympiads_list_version()
     else:
         conn.rollback()
 
@@ -192,8 +200,6 @@ def select_olympiad(request: Request, olympiad_id: int, olympiad_name: str = Que
             "SELECT id, name FROM players WHERE olympiad_id = ? ORDER BY name",
             (olympiad_id,)
         ).fetchall()
-        events = [{"id": r["id"], "name": r["name"]} for r in events]
-        players = [{"id": r["id"], "name": r["name"]} for r in players]
 
         is_authorized = dep.check_user_authorized(request, olympiad_id) is not None
         html_content = dep.templates.get_template("olympiad_page.html").render(
@@ -217,7 +223,7 @@ def select_olympiad(request: Request, olympiad_id: int, olympiad_name: str = Que
 
 @router.get("/{olympiad_id}/auth-modal")
 def get_auth_modal(request: Request, olympiad_id: int):
-    return dep.templates.TemplateResponse(request, "pin_modal.html", {"olympiad_id": olympiad_id})
+    return HTMLResponse(dep.templates.get_template("pin_modal.html").render(olympiad_id=olympiad_id))
 
 
 @router.get("/{olympiad_id}/edit")
@@ -240,16 +246,16 @@ def rename_olympiad(
     conn = request.state.conn
     conn.execute("BEGIN IMMEDIATE")
 
-    olympiad = conn.execute("SELECT * FROM olympiads WHERE id = ?", (olympiad_id,)).fetchone()
+    olympiad = dep.query_olympiad_with_auth(request, olympiad_id)
 
     result = dep.Status.SUCCESS
-    if not dep.check_olympiad_exist(request, olympiad_id):
+    if olympiad is None:
         result = dep.Status.OLYMPIAD_NOT_FOUND
-    if result == dep.Status.SUCCESS and not dep.check_olympiad_name(request, olympiad_id, olympiad_curr_name):
+    elif olympiad["name"] != olympiad_curr_name:
         result = dep.Status.OLYMPIAD_RENAMED
-    if result == dep.Status.SUCCESS and dep.check_olympiad_name_duplication(request, olympiad_id, olympiad_new_name):
+    elif dep.check_olympiad_name_duplication(request, olympiad_id, olympiad_new_name):
         result = dep.Status.NAME_DUPLICATION
-    if result == dep.Status.SUCCESS and not dep.check_user_authorized(request, olympiad_id):
+    elif not olympiad["authorized"]:
         result = dep.Status.NOT_AUTHORIZED
 
     extra_headers = {}
@@ -289,6 +295,7 @@ def rename_olympiad(
 
     if result == dep.Status.SUCCESS:
         conn.commit()
+        dep.bump_olympiads_list_version()
         dep.notify_olympiad(olympiad_id, "olympiad-renamed", exclude_tab_id=request.headers.get("X-Tab-Id", ""))
     else:
         conn.rollback()
@@ -301,14 +308,14 @@ def delete_olympiad(request: Request, olympiad_id: int, olympiad_name: str = Que
     conn = request.state.conn
     conn.execute("BEGIN IMMEDIATE")
 
-    olympiad = conn.execute("SELECT * FROM olympiads WHERE id = ?", (olympiad_id,)).fetchone()
+    olympiad = dep.query_olympiad_with_auth(request, olympiad_id)
 
     result = dep.Status.SUCCESS
-    if not dep.check_olympiad_exist(request, olympiad_id):
+    if olympiad is None:
         result = dep.Status.OLYMPIAD_NOT_FOUND
-    if result == dep.Status.SUCCESS and not dep.check_olympiad_name(request, olympiad_id, olympiad_name):
+    elif olympiad["name"] != olympiad_name:
         result = dep.Status.OLYMPIAD_RENAMED
-    if result == dep.Status.SUCCESS and not dep.check_user_authorized(request, olympiad_id):
+    elif not olympiad["authorized"]:
         result = dep.Status.NOT_AUTHORIZED
 
     extra_headers = {}
@@ -335,6 +342,7 @@ def delete_olympiad(request: Request, olympiad_id: int, olympiad_name: str = Que
 
     if result == dep.Status.SUCCESS:
         conn.commit()
+        dep.bump_olympiads_list_version()
         dep.notify_olympiad(olympiad_id, "olympiad-deleted", exclude_tab_id=tab_id)
         dep._olympiad_subscribers.pop(olympiad_id, None)
     else:
@@ -347,9 +355,7 @@ def delete_olympiad(request: Request, olympiad_id: int, olympiad_name: str = Que
 def get_olympiad_deleted_notice(request: Request, olympiad_id: int):
     tab_id = request.headers.get("X-Tab-Id", "")
     html_content = dep.render_modal_fragment("olympiad_deleted")
-    html_content += dep.templates.get_template("olympiad_badge.html").render(
-        olympiad=dep.sentinel_olympiad_badge, tab_id=tab_id, oob=True
-    )
+    html_content += dep.render_sentinel_badge_oob(tab_id)
     html_content += dep._oob_sse_link_html(0, tab_id)
     return HTMLResponse(html_content)
 
@@ -38,10 +38,12 @@ def create_player(request: Request, name: str = Form(...)):
 
     conn.execute("BEGIN IMMEDIATE")
 
+    checks = dep.check_entity_create(request, olympiad_id, "players", name)
+
     result = dep.Status.SUCCESS
-    if dep.check_entity_name_duplication(request, olympiad_id, "players", 0, name):
+    if checks["name_taken"]:
         result = dep.Status.NAME_DUPLICATION
-    if result == dep.Status.SUCCESS and not dep.check_user_authorized(request, olympiad_id):
+    elif not checks["authorized"]:
         result = dep.Status.NOT_AUTHORIZED
 
     html_content, extra_headers = dep._render_operation_denied(result, olympiad_id, "players")
@@ -53,8 +55,8 @@ def create_player(request: Request, name: str = Form(...)):
         ).fetchone()
 
         conn.execute(
-            "INSERT INTO participants (player_id, team_id) VALUES (?, ?)",
-            (inserted_row["id"], None)
+            "INSERT INTO participants (player_id, team_id, display_name) VALUES (?, ?, ?)",
+            (inserted_row["id"], None, inserted_row["name"])
         )
 
         item = {
@@ -62,14 +64,11 @@ def create_player(request: Request, name: str = Form(...)):
             "name": inserted_row["name"],
             "version": inserted_row["version"]
         }
-        html_content = dep.templates.env.get_template(
-            "entity_macros.html"
-        ).module.entity_element(item, "players")
+        macros = dep.templates.env.get_template("entity_macros.html").module
         num_players = conn.execute(
             "SELECT COUNT(*) FROM players WHERE olympiad_id = ?", (olympiad_id,)
         ).fetchone()[0]
-        macros = dep.templates.env.get_template("entity_macros.html").module
-        html_content += macros.num_players_label_oob(num_players)
+        html_content = macros.entity_element(item, "players") + macros.num_players_label_oob(num_players)
 
         extra_headers["HX-Retarget"] = "#olympiad-players-list-items"
         extra_headers["HX-Reswap"] = "afterbegin"
@@ -132,6 +131,10 @@ def rename_players(request: Request, entity_id: int, curr_name: str = Form(...),
             "UPDATE players SET name = ?, version = version + 1 WHERE id = ? RETURNING id, name, version",
             (new_name, entity_id)
         ).fetchone()
+        conn.execute(
+            "UPDATE participants SET display_name = ? WHERE player_id = ?",
+            (new_name, entity_id)
+        )
         item = {"id": entity_id, "name": updated_row["name"], "version": updated_row["version"]}
         html_content = dep.templates.env.get_template("entity_macros.html").module.entity_element(item, "players")
 
@@ -58,8 +58,8 @@ def create_team(request: Request, name: str = Form(...)):
         ).fetchone()
 
         conn.execute(
-            "INSERT INTO participants (player_id, team_id) VALUES (?, ?)",
-            (None, inserted_row["id"])
+            "INSERT INTO participants (player_id, team_id, display_name) VALUES (?, ?, ?)",
+            (None, inserted_row["id"], inserted_row["name"])
         )
 
         item = {"id": inserted_row["id"], "name": inserted_row["name"], "version": inserted_row["version"]}
@@ -98,6 +98,10 @@ def rename_teams(request: Request, entity_id: int, curr_name: str = Form(...), n
             "UPDATE teams SET name = ?, version = version + 1 WHERE id = ? RETURNING id, name, version",
             (new_name, entity_id)
         ).fetchone()
+        conn.execute(
+            "UPDATE participants SET display_name = ? WHERE team_id = ?",
+            (new_name, entity_id)
+        )
         item = {"id": entity_id, "name": updated_row["name"], "version": updated_row["version"]}
         html_content = dep.templates.env.get_template("entity_macros.html").module.entity_element(item, "teams")
 
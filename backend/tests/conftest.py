@@ -0,0 +1,20 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# src.internal.dependencies reads these at import time
+_root = Path(__file__).resolve().parents[2]
+os.environ.setdefault("DATABASE_PATH", str(Path(tempfile.mkdtemp()) / "test.db"))
+os.environ.setdefault("SCHEMA_PATH", str(_root / "backend" / "schema.sql"))
+os.environ.setdefault("PROJECT_ROOT", str(_root))
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    from src.main import app
+
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,45 @@
+import gzip
+
+from src.main import _accepts_gzip
+
+
+def test_accepts_gzip_parses_codings():
+    assert _accepts_gzip("gzip")
+    assert _accepts_gzip("deflate, gzip;q=0.5")
+    assert _accepts_gzip("*")
+    assert not _accepts_gzip("")
+    assert not _accepts_gzip("gzip;q=0")
+    assert not _accepts_gzip("br, gzip;q=0.0, *;q=1")
+    assert not _accepts_gzip("*;q=0")
+    assert not _accepts_gzip("deflate, br")
+
+
+def test_serve_css_gzip(client):
+    response = client.get("/index.css", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"].endswith('-gzip"')
+    assert gzip.decompress(client.app.state.css_gzip) == client.app.state.css
+
+
+def test_serve_css_gzip_refused(client):
+    response = client.get("/index.css", headers={"Accept-Encoding": "gzip;q=0"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == client.app.state.css_etag
+    assert response.content == client.app.state.css
+
+
+def test_serve_css_without_accept_encoding(client):
+    del client.headers["accept-encoding"]
+    response = client.get("/index.css")
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == client.app.state.css_etag
+    assert response.content == client.app.state.css
+
+
+def test_serve_css_not_modified(client):
+    etag = client.get("/index.css", headers={"Accept-Encoding": "gzip;q=0"}).headers["etag"]
+    response = client.get("/index.css", headers={"Accept-Encoding": "gzip;q=0", "If-None-Match": etag})
+    assert response.status_code == 304
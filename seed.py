@@ -28,8 +28,8 @@ def extract_all_ids(html: str, pattern: str) -> list[int]:
 
 def main():
     with httpx.Client(base_url=BASE_URL) as client:
-        # Hit any endpoint to get a session cookie
-        client.get("/health")
+        # Load the index page to get a session cookie (/health skips sessions)
+        client.get("/").raise_for_status()
 
         # --- OlympiadA ---
         r = client.post("/api/olympiads", data={"name": "OlympiadA", "pin": "1234"})
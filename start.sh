@@ -5,6 +5,8 @@ SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
 export PROJECT_ROOT="$SCRIPT_DIR"
 export DATABASE_PATH="$SCRIPT_DIR/backend/olympiad.db"
 export SCHEMA_PATH="$SCRIPT_DIR/backend/schema.sql"
+# Dev runs start from an empty database and re-seed below
+export ENNIO_DEV=1
 
 # Create virtual environment if it doesn't exist
 if [ ! -d "$SCRIPT_DIR/venv" ]; then